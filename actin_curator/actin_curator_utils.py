@@ -1,5 +1,6 @@
 import logging
 import pandas as pd
+from collections.abc import Set
 
 
 logger = logging.getLogger(__name__)
@@ -127,7 +128,7 @@ def flatten_actin_rules(actin_df: pd.DataFrame) -> set[str]:
     return set(actin_rules)
 
 
-def find_new_actin_rules(rule: dict | list | str, defined_rules: set[str]) -> list[str]:
+def find_new_actin_rules(rule: dict | list | str, defined_rules: Set[str]) -> list[str]:
     new_rules: set[str] = set()
 
     # Recursion base case
@@ -5,6 +5,13 @@ from actin_curator.actin_curator_utils import (
     find_new_actin_rules,
 )
 
+KNOWN_RULES = frozenset({
+    "IS_FEMALE",
+    "HAS_NEUTROPHILS_ABS_OF_AT_LEAST_X",
+    "HAS_ASAT_AND_ALAT_ULN_OF_AT_MOST_X_OR_AT_MOST_Y_WHEN_LIVER_METASTASES_PRESENT",
+    "HAS_EGFR_MDRD_OF_AT_LEAST_X"
+})
+
 
 def test_fix_rule_format():
     broken = [
@@ -171,13 +178,6 @@ def test_find_new_actin_rule():
         ]
     }
 
-    known_rules = {
-        "IS_FEMALE",
-        "HAS_NEUTROPHILS_ABS_OF_AT_LEAST_X",
-        "HAS_ASAT_AND_ALAT_ULN_OF_AT_MOST_X_OR_AT_MOST_Y_WHEN_LIVER_METASTASES_PRESENT",
-        "HAS_EGFR_MDRD_OF_AT_LEAST_X"
-    }
-
     expected = sorted([
         "IS_MALE",
         "HAS_THROMBOCYTES_ABS_OF_AT_LEAST_X",
@@ -185,5 +185,5 @@ def test_find_new_actin_rule():
         "HAS_CREATININE_CLEARANCE_CG_OF_AT_LEAST_X"
     ])
 
-    actual = sorted(find_new_actin_rules(rule, known_rules))
+    actual = sorted(find_new_actin_rules(rule, KNOWN_RULES))
     assert actual == expected
@@ -0,0 +1,22 @@
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption("--run-external", action="store_true", default=False,
+                     help="run tests that call an external LLM service")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "external: test calls an external LLM service")
+
+
+def pytest_collection_modifyitems(config, items):
+    run_external = config.getoption("--run-external")
+    skip_external = pytest.mark.skip(reason="needs --run-external to call the LLM service")
+
+    # tests under any external/ directory call out to an LLM
+    for item in items:
+        if "external" in item.path.parent.parts:
+            item.add_marker(pytest.mark.external)
+        if not run_external and "external" in item.keywords:
+            item.add_marker(skip_external)
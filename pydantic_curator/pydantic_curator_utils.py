@@ -73,16 +73,20 @@ def criteria_equal_ignore_description(criteria1: list[BaseCriterion], criteria2:
     return True
 
 
-# deeply remove any field with the given field name in a json type structure
+# deeply remove any field with the given field name in a json type structure.
+# the structure is modified in place and returned. only plain dicts and lists are
+# walked, not subclasses of them, which is all that json parsing or model_dump produces
 def deep_remove_field(data: Any, field_name) -> Any:
-    if isinstance(data, dict):
-        return {
-            key: deep_remove_field(value, field_name) for key, value in data.items() if key != field_name
-        }
-    elif isinstance(data, list):
-        return [deep_remove_field(item, field_name) for item in data]
-    else:
-        return data
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        node_type = type(node)
+        if node_type is dict:
+            node.pop(field_name, None)
+            stack.extend(value for value in node.values() if type(value) in (dict, list))
+        elif node_type is list:
+            stack.extend(item for item in node if type(item) in (dict, list))
+    return data
 
 
 def clean_curated_output(curated: str) -> str:
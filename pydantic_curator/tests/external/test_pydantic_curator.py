@@ -8,7 +8,7 @@ from trialcurator.openai_client import OpenaiClient
 
 class TestCategoriseRule:
 
-    @pytest.fixture
+    @pytest.fixture(scope="session")
     def client(self):
         return OpenaiClient()
 
@@ -33,7 +33,7 @@ the duration of the study treatment period and for ≥ 4 months after the last d
 
 class TestCurateIntoPy:
 
-    @pytest.fixture
+    @pytest.fixture(scope="session")
     def client(self):
         return OpenaiClient()
 
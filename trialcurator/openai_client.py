@@ -17,7 +17,7 @@ class OpenaiClient(LlmClient):
 
     # MODEL = "gpt-5-2025-08-07"  # Tested on 8 Aug 2025 & again on 8 Nov 2025. The outputs' quality is inferior. Sticking with gpt-4o for now.
 
-    def __init__(self, temperature=0.0, top_p=1.0, model=MODEL):
+    def __init__(self, temperature=0.0, top_p=1.0, model=MODEL, seed=None, max_retries=3):
         """
         Initialize the OpenaiClient class with specific model and tuning parameters.
 
@@ -25,11 +25,14 @@ class OpenaiClient(LlmClient):
             temperature (float): Sampling temperature, controlling randomness in generated responses.
             top_p (float): Nucleus sampling value, controlling diversity in generated responses.
             model (str): The name of the OpenAI model to use (defaults to "gpt-4o").
+            seed (int) (optional): Seed for best-effort deterministic sampling across repeated requests.
+            max_retries (int): Number of retries, with exponential backoff, on rate limit and transient errors.
         """
-        self.wrapped_client = openai.Client()
+        self.wrapped_client = openai.Client(max_retries=max_retries)
         self.temperature = temperature
         self.top_p = top_p
         self.model = model
+        self.seed = seed
 
     def llm_ask(self, user_prompt: str, system_prompt: str = None) -> str:
         """
@@ -59,6 +62,7 @@ class OpenaiClient(LlmClient):
             model=self.model,
             temperature=self.temperature,
             top_p=self.top_p,
+            seed=self.seed if self.seed is not None else openai.NOT_GIVEN,
             messages=messages
         ))
 
@@ -0,0 +1,82 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from trialcurator.llm_client import LlmClient
+
+logger = logging.getLogger(__name__)
+
+# set this environment variable to 1 to serve repeated LLM prompts in tests from disk
+CACHE_ENV_VAR = "TRIALCURATOR_LLM_CACHE"
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent / ".llm_cache"
+
+# bump this whenever the cached responses should no longer be trusted, e.g. after a prompt change in the model setup
+PROMPT_VERSION = "v1"
+CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+
+
+class CachedLlmClient(LlmClient):
+    """
+    An LlmClient that wraps another client and stores its responses on disk.
+
+    Responses are keyed by a sha256 hash of the prompts and the sampling settings of the
+    wrapped client, so only identical requests are served from the cache. Entries older
+    than CACHE_TTL_SECONDS are ignored and refreshed from the wrapped client. Responses are
+    also kept in memory, so a repeated prompt within one run does not touch the disk.
+    """
+
+    def __init__(self, client: LlmClient, cache_dir: Path = DEFAULT_CACHE_DIR):
+        self.client = client
+        self.cache_dir = Path(cache_dir)
+        self.memory_cache: dict[str, str] = {}
+
+    def cache_key(self, user_prompt: str, system_prompt: str = None) -> str:
+        key_data = {
+            "prompt_version": PROMPT_VERSION,
+            "client": type(self.client).__name__,
+            "model": getattr(self.client, "model", None),
+            "temperature": getattr(self.client, "temperature", None),
+            "top_p": getattr(self.client, "top_p", None),
+            "seed": getattr(self.client, "seed", None),
+            "system_prompt": system_prompt,
+            "user_prompt": user_prompt
+        }
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def llm_ask(self, user_prompt: str, system_prompt: str = None) -> str:
+        key = self.cache_key(user_prompt, system_prompt)
+        if key in self.memory_cache:
+            return self.memory_cache[key]
+
+        cache_file = self.cache_dir / f"{key}.txt"
+
+        if cache_file.exists() and time.time() - cache_file.stat().st_mtime < CACHE_TTL_SECONDS:
+            logger.info(f"using cached LLM response: {cache_file}")
+            response = cache_file.read_text(encoding="utf-8")
+            self.memory_cache[key] = response
+            return response
+
+        response = self.client.llm_ask(user_prompt, system_prompt)
+        self.memory_cache[key] = response
+
+        # write to a temp file first so that a concurrent reader never sees a partial response
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(response)
+        os.replace(tmp_path, cache_file)
+
+        return response
+
+
+def cache_if_enabled(client: LlmClient) -> LlmClient:
+    """
+    Wrap the client in a CachedLlmClient if the TRIALCURATOR_LLM_CACHE environment variable is set to 1
+    """
+    if os.environ.get(CACHE_ENV_VAR) == "1":
+        return CachedLlmClient(client)
+    return client
@@ -2,11 +2,12 @@ import pytest
 
 from trialcurator.eligibility_text_preparation import llm_exclusion_logic_flipping
 from trialcurator.openai_client import OpenaiClient
+from trialcurator.tests.cached_llm_client import cache_if_enabled
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def client():
-    return OpenaiClient()
+    return cache_if_enabled(OpenaiClient())
     # return GeminiClient()
 
 
@@ -1,24 +1,23 @@
-import re
 import pytest
 
 from trialcurator.eligibility_text_preparation import llm_sanitise_text
-from trialcurator.openai_client import OpenaiClient
+from trialcurator.tests.cached_llm_client import cache_if_enabled
 
 
 def remove_blank_lines_and_trailing_footstops(text: str) -> str:
-    return (re.sub(r'^\s*\n|(\n\s*)+\Z', '', text, flags=re.MULTILINE)
-            .strip('.\n\r')
-            .replace('.\n', '\n'))
+    text = '\n'.join(line for line in text.split('\n') if line.strip()).strip('.\n\r')
+    return text.replace('.\n', '\n')
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def client():
-    return OpenaiClient()
+    # imported here so collecting this module does not pull in the openai SDK
+    from trialcurator.openai_client import OpenaiClient
+    return cache_if_enabled(OpenaiClient(temperature=0.0, top_p=1.0, seed=1))
     # return GeminiClient()
 
 
-def test_criterion_retention_and_removal(client):
-    input_text = '''
+CRITERION_RETENTION_INPUT = '''
 Key Inclusion Criteria:
 1. Has an Eastern Cooperative Oncology Group (ECOG) performance status of 0 or 1.
 5. Willing to provide tumor tissue from newly obtained biopsy from a tumor site that has not been previously irradiated
@@ -28,13 +27,9 @@ Key Inclusion Criteria:
 9. Patient's informed consent is required.
 '''
 
-    expected_output_text = '''Inclusion Criteria:
-- ECOG performance status of 0 or 1
-- Willing to provide tumor tissue from a newly obtained biopsy from a tumor site that has not been previously irradiated
-- Adequate organ and bone marrow function as defined in the protocol
-- In the judgment of the investigator, has a life expectancy of at least 3 months'''
 
-    output_text = llm_sanitise_text(input_text, client)
+def test_criterion_retention_and_removal(client):
+    output_text = llm_sanitise_text(CRITERION_RETENTION_INPUT, client)
 
     # remove preceding and trailing blank lines and trailing fullstops
     output_text = remove_blank_lines_and_trailing_footstops(output_text)
@@ -52,26 +47,26 @@ Key Inclusion Criteria:
     assert 'life expectancy of at least 3 months' in lines[4].lower()
 
 
-def test_criterion_splitting(client):
-    input_text = '''
+CRITERION_SPLITTING_INPUT = '''
 Exclusion Criteria:
 1. Haematocrit ≥ 50%, untreated severe obstructive sleep apnoea or poorly controlled heart failure (NYHA >1)
         '''
 
-    expected_output_text = '''Exclusion Criteria:
+CRITERION_SPLITTING_EXPECTED_OUTPUT = '''Exclusion Criteria:
 - Hematocrit ≥ 50%
 - Untreated severe obstructive sleep apnea
 - Poorly controlled heart failure (NYHA > 1)'''
 
-    output_text = llm_sanitise_text(input_text, client)
+
+def test_criterion_splitting(client):
+    output_text = llm_sanitise_text(CRITERION_SPLITTING_INPUT, client)
 
     # remove preceding and trailing blank lines and trailing fullstops
     output_text = remove_blank_lines_and_trailing_footstops(output_text)
-    assert output_text == expected_output_text
+    assert output_text == CRITERION_SPLITTING_EXPECTED_OUTPUT
 
 
-def test_removal_redundant_sex(client):
-    input_text = '''
+REDUNDANT_SEX_INPUT = '''
 Inclusion Criteria:
 * Male or female, aged 18 years or older at the time consent is obtained.
 * Men and women must use effective contraceptive methods.
@@ -84,7 +79,7 @@ Exclusion Criteria:
 * For women only: pregnant or breastfeeding
 '''
 
-    expected_output_text = '''Inclusion Criteria:
+REDUNDANT_SEX_EXPECTED_OUTPUT = '''Inclusion Criteria:
 - Aged 18 years or older
 - Must use effective contraceptive methods
 - Must agree to use highly effective contraceptive precautions if conception is possible during the dosing period and up to \
@@ -95,15 +90,16 @@ to receiving the first dose of study medication
 Exclusion Criteria:
 - Pregnant or breastfeeding'''
 
-    output_text = llm_sanitise_text(input_text, client)
+
+def test_removal_redundant_sex(client):
+    output_text = llm_sanitise_text(REDUNDANT_SEX_INPUT, client)
 
     # remove blank lines
     output_text = remove_blank_lines_and_trailing_footstops(output_text)
-    assert output_text == expected_output_text
+    assert output_text == REDUNDANT_SEX_EXPECTED_OUTPUT
 
 
-def test_removal_redundant_sex2(client):
-    input_text = '''
+REDUNDANT_SEX2_INPUT = '''
 Inclusion Criteria:
 * Male or female
 * Men with prostate cancer
@@ -113,15 +109,9 @@ Inclusion Criteria:
   - Is a WOCBP who is abstinent from heterosexual intercourse
 '''
 
-    expected_output_text = '''Inclusion Criteria:
-- Men with prostate cancer
-- Not pregnant or breastfeeding
-- At least one of the following applies during the study and for ≥4 days after:
-  - Not a WOCBP
-  - WOCBP and uses highly effective contraception
-  - WOCBP who is abstinent from heterosexual intercourse'''
 
-    output_text = llm_sanitise_text(input_text, client)
+def test_removal_redundant_sex2(client):
+    output_text = llm_sanitise_text(REDUNDANT_SEX2_INPUT, client)
 
     # remove blank lines
     output_text = remove_blank_lines_and_trailing_footstops(output_text)
@@ -129,17 +119,7 @@ Inclusion Criteria:
     assert "female" not in output_text.lower()
 
 
-def test_correct_indentation(client):
-    input_text = '''
-Key Exclusion Criteria
-* Significant acute or chronic hepatitis B virus (HBV), hepatitis C virus (HCV) infection during the screening window, as well as historic positive for human immunodeficiency virus (HIV) or clinically significant active infections that render the patient ineligible for study treatment as determined by the treating investigator.
-* Patients with known HIV infection are excluded unless they meet the following criteria:
-  * Must have CD4+ T-cell (CD4+) counts ≥ 350 cells/μL at the time of screening, and
-  * Must have no history of AIDS-related opportunistic infections of HIV-associated conditions such as Kaposi sarcoma or multicentric Castleman's disease, and
-  * Patients on antiretroviral therapy (ART) must have achieved and maintained virologic suppression defined as confirmed HIV RNA level below 50 or the LLOQ (below the limit of detection) using the locally available assay at the time of screening and for at least 12 weeks before screening and agree to continue ART throughout the study
-'''
-
-    expected_output = '''
+INDENTATION_EXPECTED_OUTPUT = '''
 Exclusion Criteria:
 - Significant acute or chronic HBV, HCV infection during the screening window
 - Historic positive for HIV or clinically significant active infections that render the patient ineligible for study treatment as determined by the treating investigator
@@ -149,13 +129,16 @@ Exclusion Criteria:
   - Patients on ART must have achieved and maintained virologic suppression defined as confirmed HIV RNA level below 50 or the LLOQ using the locally available assay at the time of screening and for at least 12 weeks before screening and agree to continue ART throughout the study
 '''
 
-    actual_output = llm_sanitise_text(input_text, client)
-    actual_output = remove_blank_lines_and_trailing_footstops(actual_output)
-    assert actual_output == expected_output.strip()
-
+CORRECT_INDENTATION_INPUT = '''
+Key Exclusion Criteria
+* Significant acute or chronic hepatitis B virus (HBV), hepatitis C virus (HCV) infection during the screening window, as well as historic positive for human immunodeficiency virus (HIV) or clinically significant active infections that render the patient ineligible for study treatment as determined by the treating investigator.
+* Patients with known HIV infection are excluded unless they meet the following criteria:
+  * Must have CD4+ T-cell (CD4+) counts ≥ 350 cells/μL at the time of screening, and
+  * Must have no history of AIDS-related opportunistic infections of HIV-associated conditions such as Kaposi sarcoma or multicentric Castleman's disease, and
+  * Patients on antiretroviral therapy (ART) must have achieved and maintained virologic suppression defined as confirmed HIV RNA level below 50 or the LLOQ (below the limit of detection) using the locally available assay at the time of screening and for at least 12 weeks before screening and agree to continue ART throughout the study
+'''
 
-def test_incorrect_indentation(client):
-    input_text = '''
+INCORRECT_INDENTATION_INPUT = '''
 Key Exclusion Criteria
 * Significant acute or chronic hepatitis B virus (HBV), hepatitis C virus (HCV) infection during the screening window, as well as historic positive for human immunodeficiency virus (HIV) or clinically significant active infections that render the patient ineligible for study treatment as determined by the treating investigator.
   * Patients with known HIV infection are excluded unless they meet the following criteria:
@@ -164,16 +147,10 @@ Key Exclusion Criteria
     * Patients on antiretroviral therapy (ART) must have achieved and maintained virologic suppression defined as confirmed HIV RNA level below 50 or the LLOQ (below the limit of detection) using the locally available assay at the time of screening and for at least 12 weeks before screening and agree to continue ART throughout the study
 '''
 
-    expected_output = '''
-Exclusion Criteria:
-- Significant acute or chronic HBV, HCV infection during the screening window
-- Historic positive for HIV or clinically significant active infections that render the patient ineligible for study treatment as determined by the treating investigator
-- Patients with known HIV infection are excluded unless they meet the following criteria:
-  - Must have CD4+ counts ≥ 350 cells/μL at the time of screening
-  - Must have no history of AIDS-related opportunistic infections or HIV-associated conditions such as Kaposi sarcoma or multicentric Castleman's disease
-  - Patients on ART must have achieved and maintained virologic suppression defined as confirmed HIV RNA level below 50 or the LLOQ using the locally available assay at the time of screening and for at least 12 weeks before screening and agree to continue ART throughout the study
-'''
 
+@pytest.mark.parametrize('input_text', [CORRECT_INDENTATION_INPUT, INCORRECT_INDENTATION_INPUT],
+                         ids=['correct_indentation', 'incorrect_indentation'])
+def test_indentation(client, input_text):
     actual_output = llm_sanitise_text(input_text, client)
     actual_output = remove_blank_lines_and_trailing_footstops(actual_output)
-    assert actual_output == expected_output.strip()
+    assert actual_output == INDENTATION_EXPECTED_OUTPUT.strip()
@@ -3,11 +3,12 @@ import re
 
 from trialcurator.eligibility_text_preparation import llm_subpoint_promotion
 from trialcurator.openai_client import OpenaiClient
+from trialcurator.tests.cached_llm_client import cache_if_enabled
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def client():
-    return OpenaiClient()
+    return cache_if_enabled(OpenaiClient())
 
 
 def normalize_whitespace(text: str) -> str:
@@ -3,13 +3,14 @@ import pytest
 
 from trialcurator.eligibility_text_preparation import llm_tag_cohort_and_direction
 from trialcurator.openai_client import OpenaiClient
+from trialcurator.tests.cached_llm_client import cache_if_enabled
 
 logger = logging.getLogger(__name__)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def client():
-    return OpenaiClient()
+    return cache_if_enabled(OpenaiClient())
 
 
 def test_extract_from_header(client):
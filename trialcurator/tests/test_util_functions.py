@@ -1,4 +1,5 @@
-from trialcurator.utils import split_tagged_criteria, batch_tagged_criteria
+from trialcurator.utils import split_tagged_criteria, batch_tagged_criteria, batch_tagged_criteria_by_words, \
+    fix_json_math_expressions, fix_malformed_json, unescape_json_str
 
 
 def test_split_tagged_criteria():
@@ -55,3 +56,45 @@ INCLUDE QTc ≤ 450 msec if male and QTc ≤ 470 msec if female''',
     ]
     batched_tagged_criteria = batch_tagged_criteria(criteria_text, 3)
     assert expect_output == batched_tagged_criteria
+
+
+def test_batch_criteria_by_words():
+    criteria_text = '''
+INCLUDE Age ≥ 18 years
+EXCLUDE Pregnant or breastfeeding
+EXCLUDE Any prior treatment with prolifeprospan 20 with carmustine wafer
+INCLUDE Measurable disease
+        '''
+    expect_output = [
+        '''INCLUDE Age ≥ 18 years
+EXCLUDE Pregnant or breastfeeding''',
+        'EXCLUDE Any prior treatment with prolifeprospan 20 with carmustine wafer',
+        'INCLUDE Measurable disease'
+    ]
+    assert expect_output == batch_tagged_criteria_by_words(criteria_text, 9)
+
+
+def test_fix_json_math_expressions_only_evaluates_arithmetic():
+    # powers too large to evaluate, or with too many digits to convert to a string, are left as is
+    too_large = ['9**9**9', '(9**100)**100', '(((9**100)**100)**100)**100', ' * '.join(['9**100'] * 50)]
+    broken = '{ "RULE": [ 20 // 2, -3 + 1, (1 + 2) * 3, 2**10, 4**0.5, 1 / 0, ' + ', '.join(too_large) + ' ] }'
+    expected = '{ "RULE": [ 10, -2, 9, 1024, 2.0, 1 / 0, ' + ', '.join(too_large) + ' ] }'
+    assert fix_json_math_expressions(broken) == expected
+
+
+def test_fix_json_math_expressions_leaves_deeply_nested_expression():
+    # too deep for the python parser, must be left as is rather than raise
+    broken = '{ "RULE": [ ' + '1 + ' * 5000 + '1 ] }'
+    assert fix_json_math_expressions(broken) == broken
+
+
+def test_fix_malformed_json_empty_list_suffix():
+    broken = '{ "actin_rule": "IS_MALE[]" }'
+    expected = '{ "actin_rule": { "IS_MALE": [] } }'
+    assert fix_malformed_json(broken) == expected
+
+
+def test_unescape_json_str():
+    escaped = r'''Age \>= 18\nECOG \[0-1\]\t\"see protocol\" and \'notes\' \< 3 \\d'''
+    expected = 'Age >= 18\nECOG [0-1]\t"see protocol" and \'notes\' < 3 \\\\d'
+    assert unescape_json_str(escaped) == expected
@@ -1,29 +1,53 @@
+import ast
+import functools
 import json
+import operator
 import re
 import logging
 from trialcurator.llm_client import LlmClient
 from utils.smart_json_parser import SmartJsonParser
 
+# orjson is optional, it parses large trial files much faster than the json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 logger = logging.getLogger(__name__)
 
 
 def load_trial_data(json_file: str) -> dict:
-    with open(json_file, 'r', encoding='utf-8') as f:
-        json_data = json.load(f)
-        #logger.info(json.dumps(json_data, indent=2))
-        return json_data
+    # both parsers accept the raw utf-8 bytes, so skip decoding the file to text first
+    with open(json_file, 'rb') as f:
+        raw_json = f.read()
+    if orjson is not None:
+        return orjson.loads(raw_json)
+    return json.loads(raw_json)
+
+
+# character following a backslash -> its unescaped replacement
+UNESCAPE_MAP = {
+    "'": "'",
+    '"': '"',
+    "n": "\n",
+    "t": "\t",
+    ">": ">",
+    "<": "<",
+    "[": "[",
+    "]": "]"
+}
+
+UNESCAPE_PATTERN = re.compile(r'\\([\'"nt<>\[\]])')
 
 
 def unescape_json_str(json_str: str) -> str:
-    return (json_str.replace("\\'", "'")
-            .replace('\\"', '"')
-            .replace("\\n", "\n")
-            .replace("\\t", "\t")
-            .replace("\\>", ">")
-            .replace("\\<", "<")
-            .replace("\\[", "[")
-            .replace("\\]", "]"))
+    return UNESCAPE_PATTERN.sub(lambda m: UNESCAPE_MAP[m.group(1)], json_str)
+
+
+@functools.lru_cache(maxsize=8)
+def _code_block_pattern(lang: str) -> re.Pattern:
+    return re.compile(r"```" + lang + "(.*?)```", re.DOTALL)
 
 
 def extract_code_blocks(text: str, lang: str) -> str:
@@ -32,8 +56,7 @@ def extract_code_blocks(text: str, lang: str) -> str:
     i.e. triple backtick Python code blocks (```python ... ```).
     Otherwise, return text as is.
     """
-    pattern = re.compile(r"```" + lang + "(.*?)```", re.DOTALL)
-    match = pattern.findall(text)
+    match = _code_block_pattern(lang).findall(text)
 
     if match:
         return "".join(match)
@@ -41,6 +64,10 @@ def extract_code_blocks(text: str, lang: str) -> str:
         return text
 
 
+# This splits before each ^INCLUDE or ^EXCLUDE, ensuring full rules are kept intact
+CRITERIA_SPLIT_PATTERN = re.compile(r'(?=^(?:INCLUDE|EXCLUDE))', re.MULTILINE)
+
+
 def split_tagged_criteria(text: str) -> list[str]:
     """
     Split text containing tagged inclusion/exclusion criteria into individual criteria.
@@ -49,8 +76,7 @@ def split_tagged_criteria(text: str) -> list[str]:
     Returns:
         list[str]: List of individual criteria, each starting with INCLUDE or EXCLUDE
     """
-    # This splits before each ^INCLUDE or ^EXCLUDE, ensuring full rules are kept intact
-    criteria_list = re.split(r'(?=^(?:INCLUDE|EXCLUDE))', text.strip(), flags=re.MULTILINE)
+    criteria_list = CRITERIA_SPLIT_PATTERN.split(text.strip())
     return [c.strip() for c in criteria_list if c.strip()]
 
 
@@ -77,22 +103,25 @@ def batch_tagged_criteria_by_words(text: str, max_words: int) -> list[str]:
     Returns:
         list[str]: List of strings where each string contains batch_size criteria joined by newlines
     """
-    # split into batches
-    criteria_list = split_tagged_criteria(text)
-
-    batches = [[]]
+    batches = []
+    batch = []
     batch_words = 0
 
-    for criterion in criteria_list:
+    for criterion in split_tagged_criteria(text):
         num_words = len(criterion.split())
-        if batch_words + num_words < max_words:
-            batches[-1].append(criterion)
-            batch_words += num_words
-        else:
-            batches.append([criterion])
-            batch_words = num_words
+        # start a new batch once this criterion would take it past max_words.
+        # a single criterion longer than max_words still gets a batch of its own
+        if batch and batch_words + num_words > max_words:
+            batches.append('\n'.join(batch))
+            batch = []
+            batch_words = 0
+        batch.append(criterion)
+        batch_words += num_words
+
+    if batch:
+        batches.append('\n'.join(batch))
 
-    return ['\n'.join(batch) for batch in batches]
+    return batches
 
 
 def load_eligibility_criteria(trial_data):
@@ -101,6 +130,68 @@ def load_eligibility_criteria(trial_data):
     return unescape_json_str(eligibility_module['eligibilityCriteria'])
 
 
+MATH_EXPRESSION_PATTERN = re.compile(r'[\d.\s+\-*/()%]+\d')
+
+# Pattern to match unquoted values in dicts or lists
+# Match values after :, [ or , that are math expressions,
+# but NOT quoted (no ")
+UNQUOTED_MATH_VALUE_PATTERN = re.compile(
+    r'([:\[,]\s*)'  # matches the prefix
+    r'([\d.\s+\-*/()%]+\d)'  # matches the math expression
+    r'(\s*)'  # spaces after the expression
+    r'(?=[,\]}])',  # lookahead: ensures that what follows the expression is ,] or }
+    re.MULTILINE
+)
+
+
+MATH_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod
+}
+
+# int powers with a larger result, like 9**9**9, would take forever to evaluate
+MAX_MATH_POWER_BITS = 1024
+
+MATH_UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg
+}
+
+
+@functools.lru_cache(maxsize=256)
+def _eval_math_expression(expr: str) -> int | float:
+    """
+    Evaluate a plain arithmetic expression such as "20 // 2" or "(1 + 2) * 3".
+    Only int/float literals and the operators above are allowed, anything else raises ValueError.
+    Results are cached since LLM output tends to repeat the same expressions.
+    """
+
+    def eval_node(node: ast.AST) -> int | float:
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            return node.value
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow):
+            base = eval_node(node.left)
+            exponent = eval_node(node.right)
+            if type(base) is int and type(exponent) is int and abs(base).bit_length() * exponent > MAX_MATH_POWER_BITS:
+                raise ValueError(f"math expression result too large: {expr}")
+            result = operator.pow(base, exponent)
+            # a negative base with a fractional exponent gives a complex number
+            if isinstance(result, complex):
+                raise ValueError(f"unsupported math expression: {expr}")
+            return result
+        if isinstance(node, ast.BinOp) and type(node.op) in MATH_BINARY_OPERATORS:
+            return MATH_BINARY_OPERATORS[type(node.op)](eval_node(node.left), eval_node(node.right))
+        if isinstance(node, ast.UnaryOp) and type(node.op) in MATH_UNARY_OPERATORS:
+            return MATH_UNARY_OPERATORS[type(node.op)](eval_node(node.operand))
+        raise ValueError(f"unsupported math expression: {expr}")
+
+    return eval_node(ast.parse(expr.strip(), mode='eval').body)
+
+
 def fix_json_math_expressions(raw_json: str) -> str:
     """
     Fixes math expressions in JSON values, including inside lists.
@@ -108,13 +199,14 @@ def fix_json_math_expressions(raw_json: str) -> str:
     """
 
     def is_math_expression(s: str) -> bool:
-        return bool(re.fullmatch(r'[\d.\s+\-*/()%]+\d', s.strip()))
+        return bool(MATH_EXPRESSION_PATTERN.fullmatch(s.strip()))
 
-    def safe_eval(expr: str):
+    def safe_eval(expr: str) -> str | None:
         try:
-            return eval(expr, {"__builtins__": None}, {})
-        except Exception:
-            return expr
+            # str() raises ValueError for an int with more digits than python allows to convert
+            return str(_eval_math_expression(expr))
+        except (SyntaxError, ValueError, ArithmeticError, RecursionError):
+            return None
 
     def replacer(match):
         prefix = match.group(1)
@@ -123,67 +215,47 @@ def fix_json_math_expressions(raw_json: str) -> str:
 
         if is_math_expression(expr):
             result = safe_eval(expr)
-            if isinstance(result, (int, float)):
+            if result is not None:
                 return f"{prefix}{result}{suffix}"
 
         return match.group(0)
 
-    # Pattern to match unquoted values in dicts or lists
-    # Match values after :, [ or , that are math expressions,
-    # but NOT quoted (no ")
-    pattern = re.compile(
-        r'([:\[,]\s*)'  # matches the prefix
-        r'([\d.\s+\-*/()%]+\d)'  # matches the math expression
-        r'(\s*)'  # spaces after the expression
-        r'(?=[,\]}])',  # lookahead: ensures that what follows the expression is ,] or }
-        re.MULTILINE
-    )
-    fixed = pattern.sub(replacer, raw_json)
+    fixed = UNQUOTED_MATH_VALUE_PATTERN.sub(replacer, raw_json)
 
     return fixed
 
 
-def fix_malformed_json(json_str: str) -> str:
-    """
-    Sometimes LLM outputs malformed json, it is much easier to fix with regex than
-    to overload the prompts with more instructions
-    """
+# Fix dictionary without value, e.g., { "IS_MALE" } -> "IS_MALE"
+VALUELESS_DICT_PATTERN = re.compile(r'{\s*("\w+")\s*}')
 
-    """
-    Fix dictionary without value, e.g., { "IS_MALE" } -> "IS_MALE"
-    """
-    pattern = r'{\s*("\w+")\s*}'
-    json_str = re.sub(pattern, r'\1', json_str)
+# Fix malformed entries like:
+#   "actin_rule": "IS_MALE[]"
+# to:
+#   "actin_rule": { "IS_MALE": [] }
+EMPTY_LIST_SUFFIX_PATTERN = re.compile(r'("\w+")\s*:\s*("\w+)\[\]"')
 
-    """
-    Fix malformed entries like:
-      "actin_rule": "IS_MALE[]"
-    to:
-      "actin_rule": { "IS_MALE": [] }
-    """
-    pattern = r'("\w+")\s*:\s*("\w+)\[\]"'
-    replacement = r'\1: { \2: [] }'
-    json_str = re.sub(pattern, replacement, json_str)
+# Fix malformed entries like:
+#   "actin_rule": "RULE_NAME": [1]
+# to:
+#   "actin_rule": { "RULE_NAME": [1] }
+UNWRAPPED_RULE_LIST_PATTERN = re.compile(r'("\w+")\s*:\s*("\w+")\s*:\s*(\[[^\]]*\])')
 
-    """
-    Fix malformed entries like:
-      "actin_rule": "RULE_NAME": [1]
-    to:
-      "actin_rule": { "RULE_NAME": [1] }
-    """
-    pattern = r'("\w+")\s*:\s*("\w+")\s*:\s*(\[[^\]]*\])'
-    replacement = r'\1: { \2: \3 }'
-    json_str = re.sub(pattern, replacement, json_str)
+# Fix malformed entries like:
+#   "actin_rule": "NOT": "RULE_NAME"
+# to:
+#   "actin_rule": { "NOT": "RULE_NAME" }
+UNWRAPPED_RULE_VALUE_PATTERN = re.compile(r'("\w+")\s*:\s*("\w+")\s*:\s*("\w+")')
 
+
+def fix_malformed_json(json_str: str) -> str:
     """
-    Fix malformed entries like:
-      "actin_rule": "NOT": "RULE_NAME"
-    to:
-      "actin_rule": { "NOT": "RULE_NAME" }
+    Sometimes LLM outputs malformed json, it is much easier to fix with regex than
+    to overload the prompts with more instructions
     """
-    pattern = r'("\w+")\s*:\s*("\w+")\s*:\s*("\w+")'
-    replacement = r'\1: { \2: \3 }'
-    json_str = re.sub(pattern, replacement, json_str)
+    json_str = VALUELESS_DICT_PATTERN.sub(r'\1', json_str)
+    json_str = EMPTY_LIST_SUFFIX_PATTERN.sub(r'\1: { \2": [] }', json_str)
+    json_str = UNWRAPPED_RULE_LIST_PATTERN.sub(r'\1: { \2: \3 }', json_str)
+    json_str = UNWRAPPED_RULE_VALUE_PATTERN.sub(r'\1: { \2: \3 }', json_str)
 
     # fix up anything that has uncompleted numerical calculations
     json_str = fix_json_math_expressions(json_str)
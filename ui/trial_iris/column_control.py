@@ -9,10 +9,13 @@ from ui.trial_iris.column_definitions import COLUMN_DEFINITIONS
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_AVAILABLE_COLUMNS = tuple(col.name for col in COLUMN_DEFINITIONS if col.defaultHidden)
+DEFAULT_VISIBLE_COLUMNS = tuple(col.name for col in COLUMN_DEFINITIONS if not col.defaultHidden)
+
 class ColumnControlState(rx.State):
 
-    available_columns: list[str] = [col.name for col in COLUMN_DEFINITIONS if col.defaultHidden]
-    visible_columns: list[str] = [col.name for col in COLUMN_DEFINITIONS if not col.defaultHidden]
+    available_columns: list[str] = list(DEFAULT_AVAILABLE_COLUMNS)
+    visible_columns: list[str] = list(DEFAULT_VISIBLE_COLUMNS)
 
     # save preference to local storage for persistence
     column_preference: str = rx.LocalStorage(name="column_preference")
@@ -69,8 +72,8 @@ class ColumnControlState(rx.State):
             self.visible_columns = json.loads(self.column_preference)
 
     def reset_columns(self):
-        self.available_columns = [col.name for col in COLUMN_DEFINITIONS if col.defaultHidden]
-        self.visible_columns = [col.name for col in COLUMN_DEFINITIONS if not col.defaultHidden]
+        self.available_columns = list(DEFAULT_AVAILABLE_COLUMNS)
+        self.visible_columns = list(DEFAULT_VISIBLE_COLUMNS)
 
 
 # Custom DnD Kit wrapper component
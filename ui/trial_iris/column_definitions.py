@@ -1,4 +1,3 @@
-import re
 from dataclasses import dataclass
 from typing import Optional
 
@@ -16,7 +15,7 @@ class ColumnDefinition:
     width: Optional[str] = None
 
 
-CRITERION_TYPE_NAMES = [re.search(r'.*\.(\w+)Criterion', str(c)).group(1) for c in BaseCriterion.__subclasses__()]
+CRITERION_TYPE_NAMES = [c.__name__.removesuffix('Criterion') for c in BaseCriterion.__subclasses__()]
 
 # -- Dynamic columns from criterion names --
 DYNAMIC_COLUMNS = {
@@ -38,7 +37,7 @@ class Columns:
     ACTION = ColumnDefinition("Action", isDerived=True)
     CODE = ColumnDefinition("Code", isDerived=True)
     NOTES = ColumnDefinition("Notes")
-    ERROR = ColumnDefinition("Error", defaultHidden=True)
+    ERROR = ColumnDefinition("Error", isDerived=True, defaultHidden=True)
     LLM_CODE = ColumnDefinition("LlmCode", defaultHidden=True)
     OVERRIDE_CODE = ColumnDefinition("OverrideCode", defaultHidden=True)
 
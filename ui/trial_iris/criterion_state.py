@@ -1,5 +1,7 @@
 import reflex as rx
+import numpy as np
 import pandas as pd
+import functools
 import logging
 from typing import Any
 from pydantic_curator.criterion_parser import parse_criterion
@@ -7,15 +9,95 @@ from .column_definitions import *
 
 logger = logging.getLogger(__name__)
 
+
+# cached since many criteria share the same code
+@functools.lru_cache(maxsize=4096)
+def criterion_parse_error(code: str) -> str | None:
+    """Parse the criterion code and return the error message, or None if it parses."""
+    try:
+        parse_criterion(code)
+        return None
+    except Exception as e:
+        return str(e)
+
+
+def categorize_filter_columns(trial_df: pd.DataFrame):
+    """Store the filterable text columns as categories, so the isin() in apply_filters only
+    compares small integer codes. Columns without any value, like a criterion type column
+    missing from an older file, are left as they are since a category of them has no values."""
+    for c in COLUMN_DEFINITIONS:
+        if c.filterable and c.type == str and trial_df[c.name].notna().any():
+            trial_df[c.name] = trial_df[c.name].astype('category')
+
+
+def filter_options(trial_df: pd.DataFrame, column: ColumnDefinition) -> list[Any]:
+    """The values a user can choose from in the filter of the column."""
+    if column.type == bool:
+        return ['true', 'false']
+    if isinstance(trial_df[column.name].dtype, pd.CategoricalDtype):
+        # the categories are already the sorted distinct values
+        return trial_df[column.name].cat.categories.tolist()
+    return sorted(trial_df[column.name].unique().tolist())
+
+
+def deselected_mask(trial_df: pd.DataFrame, filter_name: str, deselected: list[Any]) -> pd.Series | None:
+    """The rows kept by the filter of a column, or None if it has no deselected values."""
+    if len(deselected) > 0:
+        return ~trial_df[filter_name].isin(deselected)
+    return None
+
+
+def filtered_row_positions(trial_df: pd.DataFrame, filter_masks: list[pd.Series],
+                           sort_by: dict[str, bool]) -> np.ndarray:
+    """Positions in trial_df of the rows kept by all the filter masks, in the order given by sort_by."""
+    filter_mask = pd.Series(True, index=trial_df.index)
+
+    for mask in filter_masks:
+        filter_mask &= mask
+
+    row_positions = np.flatnonzero(filter_mask.to_numpy())
+
+    if len(sort_by) > 0:
+        # only the sort columns of the filtered rows are copied, the sorted
+        # index of those then gives the display order of the positions
+        sort_columns = [s for s, _ in sort_by.items()]
+        sort_keys = trial_df[sort_columns].iloc[row_positions].reset_index(drop=True)
+        sort_order = sort_keys.sort_values(
+            by=sort_columns,
+            ascending=[d for _, d in sort_by.items()]).index
+        row_positions = row_positions[sort_order.to_numpy()]
+
+    return row_positions
+
+
+def page_records(page_data: pd.DataFrame) -> list[dict[str, Any]]:
+    """Convert the rows of a page to the dicts sent to the frontend."""
+    columns = [c.name for c in COLUMN_DEFINITIONS if c.name in page_data.columns]
+
+    # categorical and string columns give nan or pd.NA for a missing value, send it as None
+    page_values = page_data[columns].astype(object)
+    page_values = page_values.where(page_values.notna(), None)
+
+    records = page_values.to_dict('records')
+    return [{INDEX_COLUMN: idx, **record} for idx, record in zip(page_data.index, records)]
+
+
 class CriterionState(rx.State):
     # Data state
     _trial_df: pd.DataFrame = pd.DataFrame()
-    _filtered_trial_df: pd.DataFrame = pd.DataFrame()
+
+    # positions in _trial_df of the rows that pass the filters, in display order.
+    # keeping these instead of a filtered copy means no column data is copied on each filter change
+    _row_positions: np.ndarray = np.arange(0)
 
     # filters
     options_dict: dict[str, list[Any]] = {}
     deselected_dict: dict[str, list[Any]] = {}
 
+    # rows kept by each filter that has deselected values, so that changing one
+    # filter does not need to recompute the masks of the others
+    _filter_masks: dict[str, pd.Series] = {}
+
     # sort by column and if it is ascending
     sort_by: dict[str, bool] = {}
 
@@ -34,6 +116,7 @@ class CriterionState(rx.State):
     @rx.event
     async def set_trial_df(self, trial_df: pd.DataFrame):
         self._trial_df = trial_df
+        self._filter_masks = {}
 
         # set the CODE column
         self._trial_df[Columns.CODE.name] = self._trial_df[Columns.LLM_CODE.name].mask(
@@ -41,24 +124,31 @@ class CriterionState(rx.State):
             self._trial_df[Columns.OVERRIDE_CODE.name]
         )
 
-        self._filtered_trial_df = self._trial_df
+        # parse every criterion once up front, so changing page does not need to parse again
+        self._trial_df[Columns.ERROR.name] = self._trial_df[Columns.CODE.name].map(criterion_parse_error)
+
+        categorize_filter_columns(self._trial_df)
+
+        self._row_positions = np.arange(len(self._trial_df))
 
         self.total_pages = (len(self._trial_df) + self.page_size - 1) // self.page_size
         self.current_page = 0
 
         for c in COLUMN_DEFINITIONS:
             if c.filterable:
-                if c.type == bool:
-                    self.add_filter(c.name, ['true', 'false'])
-                else:
-                    self.add_filter(c.name, sorted(self._trial_df[c.name].unique().tolist()))
+                self.add_filter(c.name, filter_options(self._trial_df, c), apply=False)
+
+        # apply once all the filters are added, rather than once per filter
+        self.apply_filters()
 
     @rx.event
-    def add_filter(self, filter_name: str, values: list[Any]):
+    def add_filter(self, filter_name: str, values: list[Any], apply: bool = True):
         self.options_dict[filter_name] = values.copy()
         self.deselected_dict[filter_name] = []
         #logger.debug(f"added filter: {filter_name}")
-        self.apply_filters()
+        self.update_filter_mask(filter_name)
+        if apply:
+            self.apply_filters()
 
     @rx.event
     def toggle_option(self, filter_name: str, option: Any):
@@ -67,18 +157,21 @@ class CriterionState(rx.State):
             self.deselected_dict[filter_name].remove(option)
         else:
             self.deselected_dict[filter_name].append(option)
+        self.update_filter_mask(filter_name)
         self.apply_filters()
 
     @rx.event
     def select_all(self, filter_name: str):
         logger.info(f"select all: {filter_name}")
         self.deselected_dict[filter_name].clear()
+        self.update_filter_mask(filter_name)
         self.apply_filters()
 
     @rx.event
     def clear_all(self, filter_name: str):
         logger.info(f"clear all: {filter_name}")
         self.deselected_dict[filter_name] = self.options_dict[filter_name].copy()
+        self.update_filter_mask(filter_name)
         self.apply_filters()
 
     @rx.event
@@ -97,60 +190,39 @@ class CriterionState(rx.State):
             self.sort_by[col] = True
         self.apply_filters(reset_page=True)
 
+    def update_filter_mask(self, filter_name: str):
+        """Recompute the mask of a single filter, after its selection or its column changed."""
+        mask = deselected_mask(self._trial_df, filter_name, self.deselected_dict[filter_name])
+        if mask is not None:
+            self._filter_masks[filter_name] = mask
+        else:
+            self._filter_masks.pop(filter_name, None)
+
     def apply_filters(self, reset_page: bool = False):
         """Apply all active filters."""
         if self._trial_df.empty:
             return
 
-        filter_mask = pd.Series(True, index=self._trial_df.index)
-
         logger.debug('applying filter')
 
-        for filter_name, filter_values in self.deselected_dict.items():
-            if len(filter_values) > 0:
-                filter_mask &= ~self._trial_df[filter_name].isin(filter_values)
-
-        self._filtered_trial_df = self._trial_df[filter_mask]
-
-        if len(self.sort_by) > 0:
-            self._filtered_trial_df = self._filtered_trial_df.sort_values(
-                by=[s for s, _ in self.sort_by.items()],
-                ascending=[d for _, d in self.sort_by.items()])
+        self._row_positions = filtered_row_positions(self._trial_df, list(self._filter_masks.values()), self.sort_by)
 
-        self.total_pages = (len(self._filtered_trial_df) + self.page_size - 1) // self.page_size
+        self.total_pages = (len(self._row_positions) + self.page_size - 1) // self.page_size
         if reset_page:
             self.current_page = 0
         self.update_current_page_data()
 
     def update_current_page_data(self):
         """Get data for current page."""
-        if self._filtered_trial_df.empty:
+        if len(self._row_positions) == 0:
             self.current_page_data = []
 
         logger.debug('updating page data')
 
         start_idx = self.current_page * self.page_size
         end_idx = start_idx + self.page_size
-        page_data = self._filtered_trial_df.iloc[start_idx:end_idx]
-
-        def process_row(idx, row):
-            formatted_criterion = row[Columns.CODE.name]
-            parse_error = None
-            try:
-                parse_criterion(formatted_criterion)
-            except Exception as e:
-                parse_error = str(e)
-
-            result_row = {
-                INDEX_COLUMN: idx,
-                **{c.name: row[c.name] for c in COLUMN_DEFINITIONS if c.name in page_data.columns},
-                Columns.ERROR.name: parse_error,
-            }
-            return result_row
-
-        # Apply row-wise using index-based access to the vectorized values
-        result = page_data.apply(lambda row: process_row(row.name, row), axis=1).values.tolist()
-        self.current_page_data = result
+        page_data = self._trial_df.iloc[self._row_positions[start_idx:end_idx]]
+        self.current_page_data = page_records(page_data)
 
     @rx.event
     def go_to_page(self, page: int):
@@ -178,10 +250,12 @@ class CriterionState(rx.State):
         """Update override for a specific row."""
         try:
             logger.info(f"update criterion: index={index}, criterion={criterion}")
-            self._trial_df.loc[index, Columns.OVERRIDE_CODE.name] = criterion
-            self._trial_df.loc[index, Columns.OVERRIDE.name] = True
-            self._trial_df.loc[index, Columns.CODE.name] = criterion
+            self._trial_df.at[index, Columns.OVERRIDE_CODE.name] = criterion
+            self._trial_df.at[index, Columns.OVERRIDE.name] = True
+            self._trial_df.at[index, Columns.CODE.name] = criterion
+            self._trial_df.at[index, Columns.ERROR.name] = criterion_parse_error(criterion)
             # Refresh the filtered dataframe, in case we got filter on override
+            self.update_filter_mask(Columns.OVERRIDE.name)
             self.apply_filters()
             return rx.toast.success("Criterion updated")
         except Exception as e:
@@ -190,24 +264,27 @@ class CriterionState(rx.State):
     @rx.event
     async def delete_override(self, index: int):
         logger.info(f"delete override: index={index}")
-        self._trial_df.loc[index, Columns.OVERRIDE_CODE.name] = None
-        self._trial_df.loc[index, Columns.OVERRIDE.name] = False
+        self._trial_df.at[index, Columns.OVERRIDE_CODE.name] = None
+        self._trial_df.at[index, Columns.OVERRIDE.name] = False
         # restore the LLM code
-        self._trial_df.loc[index, Columns.CODE.name] = self._trial_df.loc[index, Columns.LLM_CODE.name]
+        self._trial_df.at[index, Columns.CODE.name] = self._trial_df.at[index, Columns.LLM_CODE.name]
+        self._trial_df.at[index, Columns.ERROR.name] = criterion_parse_error(self._trial_df.at[index, Columns.CODE.name])
         # Refresh the filtered dataframe, in case we got filter on override
+        self.update_filter_mask(Columns.OVERRIDE.name)
         self.apply_filters()
         return rx.toast.success("Override deleted")
 
     @rx.event
     def edit_notes(self, idx: int, notes: str):
         logger.info(f"edit notes: idx={idx}, notes={notes}")
-        self._trial_df.loc[idx, Columns.NOTES.name] = notes
+        self._trial_df.at[idx, Columns.NOTES.name] = notes
         # Refresh the filtered dataframe, in case we got filter on override
         self.apply_filters()
 
     @rx.event
     def mark_checked(self, idx: int, checked: bool):
         logger.info(f"mark checked: idx={idx}, checked={checked}")
-        self._trial_df.loc[idx, Columns.CHECKED.name] = checked
+        self._trial_df.at[idx, Columns.CHECKED.name] = checked
         # Refresh the filtered dataframe, in case we got filter on override
+        self.update_filter_mask(Columns.CHECKED.name)
         self.apply_filters()
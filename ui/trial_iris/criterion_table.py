@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 from typing import Any
@@ -102,7 +103,10 @@ class FileSaveLoadState(rx.State):
         try:
             save_path = os.path.expanduser(self.file_path)
             columns = [c.name for c in COLUMN_DEFINITIONS if not c.isDerived]
-            criterion_state._trial_df[columns].to_csv(save_path, sep='\t', index=False, na_rep='NULL')
+            # selecting the columns takes a copy, so the write in the worker thread
+            # does not race with edits made while it runs
+            save_df = criterion_state._trial_df[columns]
+            await asyncio.to_thread(save_df.to_csv, save_path, sep='\t', index=False, na_rep='NULL')
             logger.info(f"saved criterion df to: {self.file_path}")
             yield rx.toast.success(f"Saved criteria to {self.file_path}", duration=3000, close_button=True)
         except Exception as e:
@@ -110,6 +114,22 @@ class FileSaveLoadState(rx.State):
             yield rx.toast.error(f"Error saving criteria: {str(e)}", duration=10_000, close_button=True)
 
 
+def code_cell(code: rx.Var) -> rx.Component:
+    return rx.table.cell(
+        rx.code_block(
+            code,
+            language="ada",
+            can_copy=False,
+            wrap_long_lines=True,
+            font_size="12px",
+            style={
+                "margin": "0"
+            }
+        ),
+        max_width="700px"
+    )
+
+
 def render_cell(row: dict[str, Any], col: str) -> rx.Component:
     return rx.match(
         col,
@@ -123,21 +143,10 @@ def render_cell(row: dict[str, Any], col: str) -> rx.Component:
                 row_action_menu(row)
             )
         ),
-        (Columns.CODE.name, Columns.LLM_CODE.name, Columns.OVERRIDE_CODE.name,
-            rx.table.cell(
-                rx.code_block(
-                    row[col],
-                    language="ada",
-                    can_copy=False,
-                    wrap_long_lines=True,
-                    font_size="12px",
-                    style={
-                        "margin": "0"
-                    }
-                ),
-                max_width="700px"
-            )
-        ),
+        # one arm per code column so that each reads its value with a fixed key
+        (Columns.CODE.name, code_cell(row[Columns.CODE.name])),
+        (Columns.LLM_CODE.name, code_cell(row[Columns.LLM_CODE.name])),
+        (Columns.OVERRIDE_CODE.name, code_cell(row[Columns.OVERRIDE_CODE.name])),
         (Columns.OVERRIDE.name,
             rx.table.cell(
                 rx.cond(
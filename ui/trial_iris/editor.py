@@ -3,8 +3,8 @@ import logging
 import reflex as rx
 from reflex import ImportVar
 
-from pydantic_curator.criterion_parser import parse_criterion
 from .codemirror_merge import codemirror_original, codemirror_merge, codemirror_modified
+from .criterion_state import criterion_parse_error
 
 logger = logging.getLogger(__name__)
 
@@ -35,15 +35,16 @@ class EditorState(rx.State):
         # do this to ensure the edited code is not lost
         self.new_code = new_code
 
-        # try to parse it
-        try:
-            parse_criterion(new_code)
+        # try to parse it, the result is cached so saving the override does not parse it again
+        parse_error = criterion_parse_error(new_code)
+        if parse_error is None:
             self.editor_open = False
             return self.__class__.save_override(self.idx, new_code)
-        except Exception as e:
-            # put the error in the table
-            logger.info(f"error parsing criterion: {new_code}, error: {str(e)}")
-            self.error_message = str(e)
+
+        # put the error in the table
+        logger.info(f"error parsing criterion: {new_code}, error: {parse_error}")
+        self.error_message = parse_error
+        return None
 
     @rx.event
     def open_dialog(self, idx: int, code: str, new_code: str, title: str = ""):
@@ -0,0 +1,49 @@
+import pandas as pd
+
+from ui.trial_iris.column_definitions import COLUMN_DEFINITIONS, DYNAMIC_COLUMNS, INDEX_COLUMN, Columns
+from ui.trial_iris.criterion_state import categorize_filter_columns, deselected_mask, filter_options, \
+    filtered_row_positions, page_records
+
+
+def make_trial_df(trial_ids: list[str], index: list[int] | None = None) -> pd.DataFrame:
+    # like load_file: text columns are read as strings, bool columns as bools
+    trial_df = pd.DataFrame({c.name: trial_ids if c.type == str else False for c in COLUMN_DEFINITIONS}, index=index)
+    return trial_df.astype({c.name: pd.StringDtype() for c in COLUMN_DEFINITIONS if c.type == str})
+
+
+def test_missing_dynamic_column_is_none():
+    missing_column = next(iter(DYNAMIC_COLUMNS.values()))
+
+    # a column missing from the file is filled with None by load_file
+    trial_df = make_trial_df(['A', 'B'])
+    trial_df[missing_column.name] = None
+
+    categorize_filter_columns(trial_df)
+    records = page_records(trial_df)
+
+    assert [r[missing_column.name] for r in records] == [None, None]
+    assert filter_options(trial_df, missing_column) == [None]
+    assert [r[Columns.TRIAL_ID.name] for r in records] == ['A', 'B']
+    assert filter_options(trial_df, Columns.TRIAL_ID) == ['A', 'B']
+
+
+def test_filter_sort_and_edit_override():
+    # index labels differ from the row positions, the state edits rows by label
+    trial_df = make_trial_df(['T1', 'T2', 'T3', 'T4'], index=[10, 11, 12, 13])
+    categorize_filter_columns(trial_df)
+
+    filter_masks = {Columns.TRIAL_ID.name: deselected_mask(trial_df, Columns.TRIAL_ID.name, ['T2'])}
+    sort_by = {Columns.TRIAL_ID.name: False}
+    row_positions = filtered_row_positions(trial_df, list(filter_masks.values()), sort_by)
+    assert row_positions.tolist() == [3, 2, 0]
+
+    # like update_override, then sort the overridden rows first
+    trial_df.at[12, Columns.OVERRIDE.name] = True
+    assert deselected_mask(trial_df, Columns.OVERRIDE.name, []) is None
+    sort_by = {Columns.OVERRIDE.name: False, Columns.TRIAL_ID.name: False}
+    row_positions = filtered_row_positions(trial_df, list(filter_masks.values()), sort_by)
+    assert row_positions.tolist() == [2, 3, 0]
+
+    records = page_records(trial_df.iloc[row_positions])
+    assert [(r[INDEX_COLUMN], r[Columns.TRIAL_ID.name], r[Columns.OVERRIDE.name]) for r in records] == [
+        (12, 'T3', True), (13, 'T4', False), (10, 'T1', False)]